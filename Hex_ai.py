@@ -1,9 +1,12 @@
 import sys
-import math
 import random
 import numpy as np
-from Hex_utils import (SIZE, get_neighbors, initialize_board, display_board,
-                       apply_action, check_winner, is_valid_action)
+from Hex_utils import (SIZE, FULL_MASK, ROT, initialize_board, display_board,
+                       apply_action, player_bitboard, rotate_board, iter_bits,
+                       apply_action_bb, check_winner_bb)
+from Hex_core import (WIN_SCORE, INF, negamax, new_cache, new_eval_cache,
+                      new_killers)
+from Hex_tablebase import TABLEBASE_PATH, load_tablebase, probe_tablebase
 
 # =========================
 #  ZOBRISTハッシュの準備
@@ -11,187 +14,135 @@ from Hex_utils import (SIZE, get_neighbors, initialize_board, display_board,
 # ZOBRIST_RANDOMS[cell_id][0] => cell_idにplayer=1が置かれている場合に使う乱数
 # ZOBRIST_RANDOMS[cell_id][1] => cell_idにplayer=-1が置かれている場合に使う乱数
 ZOBRIST_RANDOMS = None
+# ZOBRIST_RANDOMS と同じ乱数の np.uint64 配列 (compute_zobrist_hash 用)
+ZOBRIST_ARRAY = None
+# ZOBRIST_SIDE => 手番が player=-1 のときにXORする乱数
+ZOBRIST_SIDE = None
+# 探索 (Hex_core.negamax) に渡す np.uint64 配列 (shape: [SIZE*SIZE, 2])
+# 着手のたびに手番も入れ替わるので、ZOBRIST_RANDOMS に ZOBRIST_SIDE をXORしておく
+ZOBRIST_TABLE = None
 
 def init_zobrist():
-    global ZOBRIST_RANDOMS
+    global ZOBRIST_RANDOMS, ZOBRIST_ARRAY, ZOBRIST_SIDE, ZOBRIST_TABLE
     random.seed(2023)  # 再現性を持たせたい場合は固定seed
     ZOBRIST_RANDOMS = [
         (random.getrandbits(64), random.getrandbits(64))
         for _ in range(SIZE * SIZE)
     ]
+    ZOBRIST_ARRAY = np.array(ZOBRIST_RANDOMS, dtype=np.uint64)
+    ZOBRIST_SIDE = random.getrandbits(64)
+    ZOBRIST_TABLE = np.array(
+        [(r0 ^ ZOBRIST_SIDE, r1 ^ ZOBRIST_SIDE) for (r0, r1) in ZOBRIST_RANDOMS],
+        dtype=np.uint64,
+    )
 
 def compute_zobrist_hash(board):
     """
     現在の盤面からZobristハッシュ値(64bit)を計算して返す。
-    毎回盤面を走査する方式。4x4程度ならこれでも十分高速。
+    盤面全体を走査するので、対局開始時 (init_state) に一度だけ呼び、
+    以降は着手のたびに差分(XOR)更新する。
+    セルごとのループは NumPy のマスク + XOR-reduce 1回ずつにまとめる。
     """
-    h = 0
-    for cell_id in range(SIZE * SIZE):
-        r, c = divmod(cell_id, SIZE)
-        val = board[r][c]
-        if val == 1:
-            # player=1
-            h ^= ZOBRIST_RANDOMS[cell_id][0]
-        elif val == -1:
-            # player=-1
-            h ^= ZOBRIST_RANDOMS[cell_id][1]
-    return h
+    board_flat = np.asarray(board).ravel()
+    h_p1 = np.bitwise_xor.reduce(ZOBRIST_ARRAY[:, 0][board_flat == 1])   # player=1
+    h_m1 = np.bitwise_xor.reduce(ZOBRIST_ARRAY[:, 1][board_flat == -1])  # player=-1
+    return int(h_p1 ^ h_m1)
 
 # =========================
-#  最短パス距離による評価
+#  完全解析テーブル
 # =========================
-def shortest_path_length(board, player):
-    """
-    board: 2次元リスト[[0, 1, ...], [...], ...]
-    player: 1 or -1
-    戻り値: 最短の手数 (存在しなければ None)
-    """
-    from collections import deque
-    target_value = 1 if player == 1 else -1
-
-    # スタート地点のリスト、ゴール条件も定義
-    if player == 1:
-        starts = [c for c in range(SIZE) if board[0][c] == target_value]
-        is_goal = lambda cell: (cell // SIZE) == (SIZE - 1)  # 最下段に到達
-    else:
-        starts = [r*SIZE for r in range(SIZE) if board[r][0] == target_value]
-        is_goal = lambda cell: (cell % SIZE) == (SIZE - 1)  # 右端に到達
-
-    visited = set()
-    queue = deque()
-    for s in starts:
-        queue.append((s, 0))  # (セル番号, 距離)
-        visited.add(s)
-
-    while queue:
-        current, dist = queue.popleft()
-        if is_goal(current):
-            return dist  # 最短距離を返す
-
-        for nxt in get_neighbors(current):
-            r, c = divmod(nxt, SIZE)
-            if board[r][c] == target_value and nxt not in visited:
-                visited.add(nxt)
-                queue.append((nxt, dist + 1))
+# Hex_tablebase.py で生成したテーブル (なければ None で、常に探索する)
+TABLEBASE = None
 
-    return None  # つながらない場合
-
-def evaluate_board(board, player):
-    """
-    board が勝敗未決の場合に使われるヒューリスティック。
-    - 自分の最短接続長が短いほど有利
-    - 相手の最短接続長が長いほど有利
-    という観点でスコアを計算し、返す。
-    大きいほど "playerにとって" 有利。
-    """
-    sp_self = shortest_path_length(board, player)
-    sp_opp = shortest_path_length(board, -player)
-
-    # どちらも経路なし
-    if sp_self is None and sp_opp is None:
-        return 0
-    # 自分だけ繋げない
-    if sp_self is None:
-        return -9999
-    # 相手だけ繋げない
-    if sp_opp is None:
-        return 9999
-
-    # (相手の最短 - 自分の最短) が大きいほど自分に有利
-    return (sp_opp - sp_self)
+def init_tablebase(path=TABLEBASE_PATH):
+    global TABLEBASE
+    TABLEBASE = load_tablebase(path)
 
 # =========================
-#  Move Ordering
+#  対局中の盤面状態
 # =========================
-def order_moves(board, valid_actions, player):
-    """
-    有効手を「evaluate_boardによる簡易評価」でソートする。
-    評価値の高い順に返す → αβ探索で先に有望手を調べ、枝刈り効率UP。
-    """
-    scored_actions = []
-    for action in valid_actions:
-        r, c = divmod(action, SIZE)
-        board[r][c] = player
-        score = evaluate_board(board, player)
-        board[r][c] = 0
-        scored_actions.append((action, score))
-    # scoreの降順にソート（高い＝有望）
-    scored_actions.sort(key=lambda x: x[1], reverse=True)
-    return [a for (a, s) in scored_actions]
+def init_state(board):
+    """
+    盤面 board から対局状態 (dict) を作る。
+    board に加えて、ビットボード・占有マスク・Zobristハッシュ (180度回転も) を持ち、
+    以降は apply_action_state で着手するたびに差分更新する。
+    盤面全体を走査するのはここだけ。
+    """
+    bb_p1 = player_bitboard(board, 1)
+    bb_m1 = player_bitboard(board, -1)
+    return {
+        "board": board,
+        "bb_p1": bb_p1,
+        "bb_m1": bb_m1,
+        "occ_mask": bb_p1 | bb_m1,
+        "hash": compute_zobrist_hash(board),
+        "hash_rot": compute_zobrist_hash(rotate_board(board)),
+    }
+
+def apply_action_state(state, action, player):
+    """
+    対局状態 state に着手を適用する (盤面の更新と有効手チェックは apply_action)。
+    """
+    apply_action(state["board"], action, player)
+    idx = 0 if player == 1 else 1
+    if player == 1:
+        state["bb_p1"] = apply_action_bb(state["bb_p1"], action)
+    else:
+        state["bb_m1"] = apply_action_bb(state["bb_m1"], action)
+    state["occ_mask"] = apply_action_bb(state["occ_mask"], action)
+    state["hash"] ^= ZOBRIST_RANDOMS[action][idx]
+    state["hash_rot"] ^= ZOBRIST_RANDOMS[ROT[action]][idx]
 
-# =========================
-#  Negamax(α-β) with Zobrist
-# =========================
-def negamax(board, depth, alpha, beta, player, cache):
+def valid_actions_of(state):
     """
-    board: 現在の盤面 (2次元リスト)
-    depth: 残り探索深度
-    alpha, beta: α-β探索用ウィンドウ
-    player: 手番 (1 or -1)
-    cache: トランスポジションテーブル (dict)
+    対局状態 state の空きセルのリストを返す (占有マスクから求める)。
     """
-    # 勝利判定: 直前に打ったのは -player
-    if check_winner(board, -player):
-        # -playerが勝っている => 現在player視点では大きな負
-        return (-999999 + depth, None)
-
-    # 空きセル取得
-    valid_actions = []
-    for cell_id in range(SIZE * SIZE):
-        if board[cell_id // SIZE][cell_id % SIZE] == 0:
-            valid_actions.append(cell_id)
-    if not valid_actions:
-        # 空きがない => 実質終局
-        return (0, None)
-
-    # 深度0 => 評価値を返す
-    if depth == 0:
-        return (evaluate_board(board, player), None)
-
-    # Zobristハッシュ + (player, depth) をキーにキャッシュ
-    board_hash = compute_zobrist_hash(board)
-    cache_key = (board_hash, player, depth)
-    if cache_key in cache:
-        return cache[cache_key]
-
-    best_score = -math.inf
-    best_move = None
-
-    # Move Ordering で手をソート
-    ordered_actions = order_moves(board, valid_actions, player)
+    return list(iter_bits(~state["occ_mask"] & FULL_MASK))
 
-    for action in ordered_actions:
-        r, c = divmod(action, SIZE)
-        board[r][c] = player
-        score, _ = negamax(board, depth - 1, -beta, -alpha, -player, cache)
-        board[r][c] = 0
-
-        # negamaxなので符号反転
-        score = -score
-
-        # best_score更新
-        if score > best_score:
-            best_score = score
-            best_move = action
-
-        # α値更新
-        alpha = max(alpha, score)
-        if alpha >= beta:
-            # βカット
-            break
-
-    # キャッシュ格納
-    cache[cache_key] = (best_score, best_move)
-    return (best_score, best_move)
-
-def find_best_move(board, player, max_depth=6, cache=None):
+def find_best_move(board, player, max_depth=6, cache=None, eval_cache=None,
+                   state=None):
     """
     現在の盤面boardと手番playerに対し、深さmax_depthで探索して最善手を返す。
-    """
+    打てる手がない (既に決着している等) 場合は None を返す。
+    深さ1からmax_depthまで反復深化し、同じcacheを使い回すことで
+    浅い探索の最善手を深い探索のMove Orderingに利用する。
+    cache / eval_cache を渡す場合は Hex_core.new_cache() / new_eval_cache()
+    で作ったもの (Numba の typed.Dict) を使うこと。
+    state (init_state で作った対局状態) を渡すと、盤面を走査せずに
+    そのビットボードとハッシュから探索を始める。
+    完全解析テーブル (TABLEBASE) が読み込まれていて局面が載っていれば、
+    探索せずにテーブルの最善手を返す。
+    """
+    if state is None:
+        state = init_state(board)
+    if TABLEBASE is not None:
+        move = probe_tablebase(TABLEBASE, state["bb_p1"], state["bb_m1"], player)
+        if move >= 0:
+            return move
     if cache is None:
-        cache = {}
-    score, action = negamax(board, max_depth, -math.inf, math.inf, player, cache)
-    return action
+        cache = new_cache()
+    if eval_cache is None:
+        eval_cache = new_eval_cache()
+    killers = new_killers(max_depth)
+    bb_p1 = state["bb_p1"]
+    bb_m1 = state["bb_m1"]
+    # 盤面のハッシュに手番を混ぜて、探索では手番込みのハッシュを1つのキーにする
+    side = ZOBRIST_SIDE if player == -1 else 0
+    h = np.uint64(state["hash"] ^ side)
+    h_rot = np.uint64(state["hash_rot"] ^ side)
+    action = -1
+    for depth in range(1, max_depth + 1):
+        score, action = negamax(bb_p1, bb_m1, depth, -INF, INF, player,
+                                cache, h, h_rot, eval_cache, killers,
+                                ZOBRIST_TABLE)
+        # 勝敗が確定したらそれ以上深く読む必要はない
+        if abs(score) >= WIN_SCORE - max_depth:
+            break
+    # 探索は「手なし」を -1 で返すので、外には None で返す
+    # (決着済みの盤面 / 空きがない盤面 / max_depth < 1)
+    if action < 0:
+        return None
+    return int(action)
 
 def play_hex_with_alphabeta(ai_players=(1, -1), max_depth=10):
     """
@@ -202,8 +153,11 @@ def play_hex_with_alphabeta(ai_players=(1, -1), max_depth=10):
     """
     # Zobrist初期化
     init_zobrist()
+    # 完全解析テーブルの読み込み (生成済みの場合のみ)
+    init_tablebase()
 
     board = initialize_board(SIZE)
+    state = init_state(board)
     print("=== Game Start (4x4 Hex) ===")
     display_board(board)
 
@@ -213,26 +167,25 @@ def play_hex_with_alphabeta(ai_players=(1, -1), max_depth=10):
     while True:
         if current_player in ai_players:  # AIのターン
             print(f"AI (Player {current_player}) thinking ...")
-            best_move = find_best_move(board, player=current_player, max_depth=max_depth)
+            best_move = find_best_move(board, player=current_player,
+                                       max_depth=max_depth, state=state)
             print(f"AI chooses action: {best_move}")
-            apply_action(board, best_move, current_player)
+            apply_action_state(state, best_move, current_player)
         else:  # 人間のターン
             print(f"Your turn (Player {current_player}).")
-            valid_actions = [
-                i for i in range(SIZE * SIZE)
-                if board[i // SIZE][i % SIZE] == 0
-            ]
+            valid_actions = valid_actions_of(state)
             print(f"Valid actions: {valid_actions}")
             action = int(input("Enter your move: "))
             while action not in valid_actions:
                 print("Invalid move. Try again.")
                 action = int(input("Enter your move: "))
-            apply_action(board, action, current_player)
+            apply_action_state(state, action, current_player)
 
         display_board(board)
 
         # 勝利判定
-        if check_winner(board, current_player):
+        player_bb = state["bb_p1"] if current_player == 1 else state["bb_m1"]
+        if check_winner_bb(player_bb, current_player):
             if current_player in ai_players:
                 print(f"AI (Player {current_player}) wins!")
             else:
@@ -0,0 +1,305 @@
+import numpy as np
+from numba import njit, types
+from numba.typed import Dict
+from Hex_utils import (SIZE, CELLS, ROW, COL, ROT, valid_actions_mask,
+                       apply_action_bb, edge_masks, expand, check_winner_bb)
+
+# =========================
+#  探索の中核 (Numba で JIT コンパイル)
+# =========================
+# 盤面は player ごとのビットボード (bb_p1, bb_m1) で、Zobristハッシュは
+# np.uint64 で扱う。Numba はグローバルの配列・整数を定数として埋め込むので、
+# tuple で持っている定数はここで配列に展開しておく。
+# ビットボードの基本操作 (着手・空きマスク・勝利判定) は Hex_utils のものを使う。
+# 1回目の呼び出しでコンパイルされ、結果は __pycache__ にキャッシュされる。
+
+_ROT = np.array(ROT, dtype=np.int64)
+
+WIN_SCORE = 999999  # 勝敗確定局面の評価値 (残り深さを足し引きして手数を反映)
+INF = 10 ** 9  # α-β探索の初期ウィンドウ (Numba では整数で扱う)
+
+# トランスポジションテーブルに格納した評価値の種類
+EXACT = 0  # 正確な値 (alpha < score < beta で探索が完了した)
+LOWER = 1  # 下界 (βカットした: 真の値は score 以上)
+UPPER = 2  # 上界 (alpha を超える手がなかった: 真の値は score 以下)
+
+# =========================
+#  盤面の評価
+# =========================
+@njit(cache=True)
+def evaluate_board(bb_p1, bb_m1, player):
+    """
+    盤面 (bb_p1, bb_m1) が勝敗未決の場合に使われるヒューリスティック。
+    - 自分だけ辺をつないでいれば 9999
+    - 相手だけ辺をつないでいれば -9999
+    - どちらもつないでいなければ 0
+    大きいほど "playerにとって" 有利。
+    自分の石だけを辿る幅優先探索なので、経路があれば既に接続済み。
+    Hexでは両者が同時に接続することはないため、自分と相手の幅優先探索を
+    1つのループで同時に進め、どちらかがゴール辺に届いた時点で打ち切る。
+    """
+    if player == 1:
+        bb_self, bb_opp = bb_p1, bb_m1
+    else:
+        bb_self, bb_opp = bb_m1, bb_p1
+    start_self, goal_self = edge_masks(player)
+    start_opp, goal_opp = edge_masks(-player)
+    frontier_self = start_self & bb_self
+    frontier_opp = start_opp & bb_opp
+    visited_self = frontier_self
+    visited_opp = frontier_opp
+
+    while frontier_self or frontier_opp:
+        if frontier_self & goal_self:
+            return 9999
+        if frontier_opp & goal_opp:
+            return -9999
+        frontier_self = expand(frontier_self) & bb_self & ~visited_self
+        visited_self |= frontier_self
+        frontier_opp = expand(frontier_opp) & bb_opp & ~visited_opp
+        visited_opp |= frontier_opp
+
+    # どちらも経路なし
+    return 0
+
+@njit(cache=True)
+def cached_evaluate(bb_p1, bb_m1, player, h, eval_cache):
+    """
+    evaluate_board を Zobristハッシュ h をキーにキャッシュして返す。
+    h は手番込みなので、eval_cache のエントリは手番ごとに別になり、
+    値は手番 player 視点のまま格納する。
+    (石の数で手番が決まるので、同じ盤面を両方の手番で評価することはない)
+    """
+    if h in eval_cache:
+        return eval_cache[h]
+    score = evaluate_board(bb_p1, bb_m1, player)
+    eval_cache[h] = score
+    return score
+
+# =========================
+#  Move Ordering
+# =========================
+def _static_order_score(cell, player):
+    """
+    手の静的な有望度 (大きいほど有望)。
+    - 盤面中央に近いほど有望 (六角距離。座標は2倍して整数で扱う)
+    - 同程度なら、自分の辺を結ぶ方向と直交する軸で中央寄りの手を優先
+    """
+    dr = 2 * ROW[cell] - (SIZE - 1)
+    dc = 2 * COL[cell] - (SIZE - 1)
+    centrality = max(abs(dr), abs(dc), abs(dr + dc))
+    lateral = abs(dc) if player == 1 else abs(dr)
+    return -2 * centrality - lateral
+
+# STATIC_ORDER[idx, cell] => 静的な有望度 (idx: player=1 なら 0, player=-1 なら 1)
+STATIC_ORDER = np.array(
+    [[_static_order_score(cell, player) for cell in range(CELLS)]
+     for player in (1, -1)],
+    dtype=np.int64,
+)
+
+# 並べ替えキーの加点。STATIC_ORDER の値域 (数十程度) より十分大きくして、
+# 「TTの最善手 > キラー手 > 静的な有望度」の優先順位を1つの整数で表す。
+_KILLER_BONUS = 1000
+_TT_BONUS = 10000
+
+@njit(cache=True)
+def order_moves(valid_mask, player, tt_move, killer_moves):
+    """
+    空きマスク valid_mask の各手を有望な順に並べた配列を返す
+    → αβ探索で先に有望手を調べ、枝刈り効率UP。
+    1. トランスポジションテーブルの最善手 (tt_move, なければ -1)
+    2. 兄弟局面でβカットを起こしたキラー手 (killer_moves, 空きスロットは -1)
+    3. STATIC_ORDER による静的な有望度
+    いずれも1手あたりO(1)で、盤面の評価は行わない。
+    """
+    idx = 0 if player == 1 else 1
+    actions = np.empty(CELLS, dtype=np.int64)
+    keys = np.empty(CELLS, dtype=np.int64)
+    n = 0
+    for action in range(CELLS):
+        if (valid_mask >> action) & 1:
+            key = STATIC_ORDER[idx, action]
+            if action == killer_moves[0] or action == killer_moves[1]:
+                key += _KILLER_BONUS
+            if action == tt_move:
+                key += _TT_BONUS
+            actions[n] = action
+            keys[n] = key
+            n += 1
+    # 降順の安定ソート (同点ならセル番号の小さい順)
+    order = np.argsort(-keys[:n], kind="mergesort")
+    return actions[:n][order]
+
+# =========================
+#  Negamax(α-β) with Zobrist
+# =========================
+@njit(cache=True)
+def orient_move(move, flipped):
+    """
+    flipped (現在の盤面が正規形の180度回転) なら手を回転して返す。
+    回転は2回で元に戻るので、TTへの格納時と取り出し時の両方で使える。
+    """
+    if flipped and move >= 0:
+        return _ROT[move]
+    return move
+
+@njit(cache=True)
+def leaf_score(bb_p1, bb_m1, player, h, h_rot, eval_cache):
+    """
+    残り深さ0の局面 (bb_p1, bb_m1) の player 視点の評価値を返す。
+    negamax の葉と同じ値を、盤面を変更せず再帰もせずに求める純粋関数。
+    """
+    # 勝利判定: 直前に打ったのは -player
+    if check_winner_bb(bb_m1 if player == 1 else bb_p1, -player):
+        return -WIN_SCORE
+    # 空きがない => 実質終局
+    if not valid_actions_mask(bb_p1, bb_m1):
+        return 0
+    canon_h = h_rot if h_rot < h else h
+    return cached_evaluate(bb_p1, bb_m1, player, canon_h, eval_cache)
+
+@njit(cache=True)
+def negamax(bb_p1, bb_m1, depth, alpha, beta, player, cache, h, h_rot,
+            eval_cache, killers, zobrist):
+    """
+    bb_p1, bb_m1: 現在の盤面 (player=1 / player=-1 の石のビットボード)
+    depth: 残り探索深度
+    alpha, beta: α-β探索用ウィンドウ
+    player: 手番 (1 or -1)
+    cache: トランスポジションテーブル (new_cache() で作る)
+    h: 現在の局面のZobristハッシュ (np.uint64, 手番込み。着手のたびにXORで差分更新)
+    h_rot: 180度回転した局面のZobristハッシュ (h と同様に差分更新)
+    eval_cache: 評価値キャッシュ (new_eval_cache() で作る)
+    killers: キラー手テーブル (new_killers() で作る)
+    zobrist: Zobrist乱数表 (np.uint64 配列, [cell_id, 0 if player==1 else 1])
+             手番の乱数もXOR済みなので、着手1回で石と手番の両方が更新される
+    戻り値: (評価値, 最善手) 最善手がなければ -1
+    """
+    # 深度0 => 評価値を返す
+    if depth == 0:
+        return (leaf_score(bb_p1, bb_m1, player, h, h_rot, eval_cache), -1)
+
+    # 勝利判定: 直前に打ったのは -player
+    if check_winner_bb(bb_m1 if player == 1 else bb_p1, -player):
+        # -playerが勝っている => 現在player視点では大きな負
+        return (-WIN_SCORE + depth, -1)
+
+    # 空きセル取得
+    valid_mask = valid_actions_mask(bb_p1, bb_m1)
+    if not valid_mask:
+        # 空きがない => 実質終局
+        return (0, -1)
+
+    # 180度回転した盤面は同じ局面なので、小さい方のハッシュを正規形として
+    # キャッシュを共有する (最善手は正規形の向きで格納する)
+    flipped = h_rot < h
+    canon_h = h_rot if flipped else h
+
+    # 手番込みのZobristハッシュ (uint64) をそのままキーにキャッシュ
+    # 探索深度はキーに含めず値の側に持たせるので、浅い反復の結果も
+    # 深い反復の Move Ordering に使える。
+    # 値は (評価値, 最善手, EXACT/LOWER/UPPER, 探索深度)
+    alpha_orig = alpha
+    cache_key = canon_h
+    tt_move = -1
+    if cache_key in cache:
+        tt_score, move, flag, tt_depth = cache[cache_key]
+        tt_move = orient_move(move, flipped)
+        # 今回以上の深さで探索済みなら、値の種類に応じて再利用する
+        if tt_depth >= depth:
+            if flag == EXACT:
+                return (tt_score, tt_move)
+            elif flag == LOWER:
+                alpha = max(alpha, tt_score)
+            else:
+                beta = min(beta, tt_score)
+            if alpha >= beta:
+                return (tt_score, tt_move)
+
+    best_score = -INF
+    best_move = -1
+
+    # Move Ordering で手をソート
+    # TTの最善手 (反復深化の浅い反復の結果も含む) を先頭に回す
+    idx = 0 if player == 1 else 1
+    killer_moves = killers[depth, idx]
+    ordered_actions = order_moves(valid_mask, player, tt_move, killer_moves)
+
+    # Principal Variation Search (NegaScout):
+    # 先頭の手 (Move Ordering で最善と見込んだ手) だけを全幅ウィンドウで探索し、
+    # 残りはヌルウィンドウ (alpha, alpha+1) で「alpha を超えないこと」だけを確かめる。
+    # 超えた (fail-high) ときだけ、その値を下限にして再探索する。
+    for i, action in enumerate(ordered_actions):
+        # ビットボードは整数なので、着手した盤面をそのまま子に渡す (戻し不要)
+        child_h = h ^ zobrist[action, idx]
+        child_h_rot = h_rot ^ zobrist[_ROT[action], idx]
+        if player == 1:
+            child_p1, child_m1 = apply_action_bb(bb_p1, action), bb_m1
+        else:
+            child_p1, child_m1 = bb_p1, apply_action_bb(bb_m1, action)
+
+        # negamaxなので符号反転
+        if depth == 1:
+            # 子は葉なので再帰せずに評価値を直接求める (ヌルウィンドウ探索も不要)
+            score = -leaf_score(child_p1, child_m1, -player, child_h,
+                                child_h_rot, eval_cache)
+        elif i == 0:
+            score, _ = negamax(child_p1, child_m1, depth - 1, -beta, -alpha,
+                               -player, cache, child_h, child_h_rot,
+                               eval_cache, killers, zobrist)
+            score = -score
+        else:
+            score, _ = negamax(child_p1, child_m1, depth - 1, -alpha - 1,
+                               -alpha, -player, cache, child_h, child_h_rot,
+                               eval_cache, killers, zobrist)
+            score = -score
+            if alpha < score < beta:
+                score, _ = negamax(child_p1, child_m1, depth - 1, -beta,
+                                   -score, -player, cache, child_h,
+                                   child_h_rot, eval_cache, killers, zobrist)
+                score = -score
+
+        # best_score更新
+        if score > best_score:
+            best_score = score
+            best_move = action
+
+        # α値更新
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            # βカット: この手を同じ深さの兄弟局面で優先するキラー手として記録
+            if killer_moves[0] != action:
+                killer_moves[1] = killer_moves[0]
+                killer_moves[0] = action
+            break
+
+    # キャッシュ格納
+    if best_score <= alpha_orig:
+        flag = UPPER
+    elif best_score >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    cache[cache_key] = (best_score, orient_move(best_move, flipped), flag, depth)
+    return (best_score, best_move)
+
+# =========================
+#  探索用テーブルの生成 (Python側から呼ぶ)
+# =========================
+def new_cache():
+    """
+    トランスポジションテーブル:
+    Zobristハッシュ (手番込み) => (評価値, 正規形の向きでの最善手,
+                                   EXACT/LOWER/UPPER, 探索深度)
+    """
+    return Dict.empty(key_type=types.uint64,
+                      value_type=types.UniTuple(types.int64, 4))
+
+def new_eval_cache():
+    """評価値キャッシュ: Zobristハッシュ (手番込み) => 手番側視点の評価値"""
+    return Dict.empty(key_type=types.uint64, value_type=types.int64)
+
+def new_killers(max_depth):
+    """キラー手テーブル: [depth, 0 if player==1 else 1] => 2スロット (空きは -1)"""
+    return np.full((max_depth + 1, 2, 2), -1, dtype=np.int64)
@@ -0,0 +1,164 @@
+import os
+import time
+import numpy as np
+from numba import njit, types
+from numba.typed import Dict
+from Hex_utils import (SIZE, CELLS, ROT, valid_actions_mask, apply_action_bb,
+                       check_winner_bb)
+from Hex_core import STATIC_ORDER
+
+# =========================
+#  完全解析テーブル (4x4 Hex)
+# =========================
+# 空の盤面から交互に打って到達できる全局面を解き、各局面の最善手を記録する。
+# Hexに引き分けはないので、局面の値は「手番側が何手で勝つ / 負けるか」だけ。
+# 勝つ局面では最短で勝つ手、負ける局面では最も長く粘る手を最善手とする。
+#
+# キーは盤面そのもの (bb_p1 | bb_m1 << CELLS) を180度回転と比べて小さい方にした
+# 正規形。Zobristハッシュと違って衝突がなく、乱数のseedにも依存しない。
+# 手番は石の数から決まる (player=1 が先手) のでキーに含めない。
+#
+# 生成: python Hex_tablebase.py  (数十秒。結果は TABLEBASE_PATH に保存)
+
+TABLEBASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "hex_tablebase.npz")
+
+_ROT = np.array(ROT, dtype=np.int64)
+# STATIC_ORDER の高い順に並べたセル (idx: player=1 なら 0, player=-1 なら 1)
+# 同じ手数の勝ち / 負けが複数あるときは、この順で先に見つかった手を選ぶ
+_MOVE_ORDER = np.argsort(-STATIC_ORDER, axis=1, kind="mergesort")
+
+# 評価値: 手番側が d 手で勝つ => _MATE - d, d 手で負ける => d - _MATE
+# (大きいほど手番側に有利。int8 に収まるよう盤面のセル数より少し大きくする)
+_MATE = CELLS + 1
+
+# =========================
+#  正規形のキー
+# =========================
+@njit(cache=True)
+def rotate_bb(bb):
+    """
+    ビットボード bb を180度回転したビットボードを返す。
+    """
+    rotated = 0
+    for cell in range(CELLS):
+        if (bb >> cell) & 1:
+            rotated |= 1 << _ROT[cell]
+    return rotated
+
+@njit(cache=True)
+def canonical_key(bb_p1, bb_m1):
+    """
+    盤面 (bb_p1, bb_m1) の正規形のキーと、盤面が正規形の180度回転かどうかを返す。
+    """
+    key = bb_p1 | (bb_m1 << CELLS)
+    rotated_key = rotate_bb(bb_p1) | (rotate_bb(bb_m1) << CELLS)
+    if rotated_key < key:
+        return rotated_key, True
+    return key, False
+
+# =========================
+#  全局面の解析
+# =========================
+@njit(cache=True)
+def _solve(bb_p1, bb_m1, player, scores, moves):
+    """
+    手番 player の局面 (bb_p1, bb_m1) を解いて評価値を返す。
+    途中の全局面の評価値と最善手 (正規形の向き) を scores / moves に記録する。
+    αβ枝刈りはせず全合法手を調べるので、到達可能な全局面が記録される。
+    """
+    key, flipped = canonical_key(bb_p1, bb_m1)
+    if key in scores:
+        return scores[key]
+
+    idx = 0 if player == 1 else 1
+    valid_mask = valid_actions_mask(bb_p1, bb_m1)
+    best_score = -_MATE
+    best_move = -1
+    for action in _MOVE_ORDER[idx]:
+        if not (valid_mask >> action) & 1:
+            continue
+        if player == 1:
+            child_p1, child_m1 = apply_action_bb(bb_p1, action), bb_m1
+            won = check_winner_bb(child_p1, 1)
+        else:
+            child_p1, child_m1 = bb_p1, apply_action_bb(bb_m1, action)
+            won = check_winner_bb(child_m1, -1)
+
+        if won:
+            # この手で勝ち (1手)
+            score = _MATE - 1
+        else:
+            child_score = _solve(child_p1, child_m1, -player, scores, moves)
+            # 相手視点の評価値を自分視点にし、手数を1手延ばす
+            if child_score > 0:
+                score = -child_score + 1
+            else:
+                score = -child_score - 1
+
+        if score > best_score:
+            best_score = score
+            best_move = action
+
+    if flipped:
+        best_move = _ROT[best_move]
+    scores[key] = best_score
+    moves[key] = best_move
+    return best_score
+
+def build_tablebase():
+    """
+    空の盤面から到達できる全局面を解き、(キー, 最善手) の配列を返す。
+    キーは昇順に並べる (probe_tablebase で二分探索するため)。
+    """
+    if 2 * CELLS > 32:
+        raise ValueError(f"完全解析は SIZE<=4 のみ対応しています (SIZE={SIZE})")
+    scores = Dict.empty(key_type=types.int64, value_type=types.int64)
+    moves = Dict.empty(key_type=types.int64, value_type=types.int64)
+    _solve(0, 0, 1, scores, moves)
+
+    keys = np.fromiter(moves.keys(), dtype=np.uint32, count=len(moves))
+    best_moves = np.fromiter(moves.values(), dtype=np.int8, count=len(moves))
+    order = np.argsort(keys)
+    return keys[order], best_moves[order]
+
+def save_tablebase(tablebase, path=TABLEBASE_PATH):
+    keys, best_moves = tablebase
+    np.savez_compressed(path, keys=keys, moves=best_moves)
+
+def load_tablebase(path=TABLEBASE_PATH):
+    """
+    保存済みのテーブルを読み込んで返す。ファイルがなければ None を返す。
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return data["keys"], data["moves"]
+
+# =========================
+#  テーブルの参照
+# =========================
+def probe_tablebase(tablebase, bb_p1, bb_m1, player):
+    """
+    局面 (bb_p1, bb_m1) で手番 player の最善手をテーブルから引いて返す。
+    テーブルにない局面 (石の数と手番が合わない局面を含む) なら -1 を返す。
+    """
+    keys, best_moves = tablebase
+    stones_p1 = bin(bb_p1).count("1")
+    stones_m1 = bin(bb_m1).count("1")
+    if stones_p1 - stones_m1 != (0 if player == 1 else 1):
+        return -1
+
+    key, flipped = canonical_key(bb_p1, bb_m1)
+    i = np.searchsorted(keys, key)
+    if i == len(keys) or keys[i] != key:
+        return -1
+    move = int(best_moves[i])
+    return ROT[move] if flipped else move
+
+if __name__ == "__main__":
+    start = time.time()
+    tablebase = build_tablebase()
+    save_tablebase(tablebase)
+    print(f"Solved {len(tablebase[0])} positions in {time.time() - start:.1f}s")
+    print(f"Saved to {TABLEBASE_PATH}")
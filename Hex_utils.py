@@ -1,9 +1,18 @@
+import numpy as np
+from numba import njit
+
 # グローバル変数
 SIZE = 4  # 盤面のサイズ
+CELLS = SIZE * SIZE  # セル数
+FULL_MASK = (1 << CELLS) - 1  # 全セルのビットが立ったマスク (SIZE=4 なら 0xFFFF)
 
-# 隣接セルを取得する関数
-def get_neighbors(cell):
-    row, col = divmod(cell, SIZE)  # 座標取得
+# ROW[cell] / COL[cell] => cell の行 / 列 (divmod を毎回呼ばずに表引きする)
+ROW = tuple(cell // SIZE for cell in range(CELLS))
+COL = tuple(cell % SIZE for cell in range(CELLS))
+
+# 隣接セルを計算する関数 (import 時に NEIGHBORS を作るためだけに使う)
+def _compute_neighbors(cell):
+    row, col = ROW[cell], COL[cell]  # 座標取得
     directions = [
         (-1, 0),  # 上
         (1, 0),   # 下
@@ -19,98 +28,158 @@ def get_neighbors(cell):
             neighbors.append(nr * SIZE + nc)
     return neighbors
 
-# 勝利条件を判定する関数
-# def check_winner(board, player):
-#     value = 1 if player == 1 else -1
-#     visited = set()
-#     stack = []
-
-#     # プレイヤー1のスタートとゴール
-#     if player == 1:
-#         start = [i for i in range(SIZE) if board[0, i] == value]
-#         goal = [i for i in range(SIZE * (SIZE - 1), SIZE * SIZE) if board[-1, i % SIZE] == value]
-#     # プレイヤー2のスタートとゴール
-#     else:
-#         start = [i for i in range(0, SIZE * SIZE, SIZE) if board[i // SIZE, 0] == value]
-#         goal = [i for i in range(SIZE - 1, SIZE * SIZE, SIZE) if board[i // SIZE, -1] == value]
-
-#     stack.extend(start)
-
-#     while stack:
-#         current = stack.pop()
-#         if current in goal:
-#             return True
-
-#         if current not in visited:
-#             visited.add(current)
-#             neighbors = get_neighbors(current)
-#             for neighbor in neighbors:
-#                 row, col = divmod(neighbor, SIZE)
-#                 if board[row, col] == value:
-#                     stack.append(neighbor)
-
-#     return False
-
-# MCTSのための勝利条件判定関数
-def check_winner(board, player):
-    import numpy as np  # 必要に応じてモジュールをインポート
-    value = 1 if player == 1 else -1
-    visited = set()
-    stack = []
+# NEIGHBORS[cell] => cell の隣接セルのタプル (全セル分を一度だけ計算しておく)
+NEIGHBORS = tuple(tuple(_compute_neighbors(cell)) for cell in range(CELLS))
 
-    # プレイヤー1のスタートとゴール
+# 隣接セルを取得する関数
+def get_neighbors(cell):
+    return NEIGHBORS[cell]
+
+# ビットボード
+# 盤面を player ごとの整数 (cell_id 番目のビット = そのセルに石がある) で表す。
+# SIZE=4 なら16セルなので1ワードに収まり、集合演算がビット演算になる。
+
+# 左端列 / 右端列以外のセルのマスク (SIZE=4 なら 0xEEEE / 0x7777)
+# シフトで隣接セルを求めるとき、行をまたいで反対側の端に回り込んだビットを消す
+NOT_LEFT = sum(1 << cell for cell in range(CELLS) if COL[cell] != 0)
+NOT_RIGHT = sum(1 << cell for cell in range(CELLS) if COL[cell] != SIZE - 1)
+
+# ROT[cell] => 盤面を180度回転したときの移動先セル
+# 180度回転しても隣接関係と各プレイヤーの辺 (上下 / 左右) は変わらないので、
+# 回転した盤面は同じ手番なら同じ局面として扱える。
+ROT = tuple(
+    (SIZE - 1 - ROW[cell]) * SIZE + (SIZE - 1 - COL[cell])
+    for cell in range(CELLS)
+)
+
+# START_MASK[player] / GOAL_MASK[player] => 各プレイヤーのスタート辺 / ゴール辺
+# player=1 は上端→下端, player=-1 は左端→右端
+START_MASK = {
+    1: sum(1 << c for c in range(SIZE)),
+    -1: sum(1 << (r * SIZE) for r in range(SIZE)),
+}
+GOAL_MASK = {
+    1: sum(1 << ((SIZE - 1) * SIZE + c) for c in range(SIZE)),
+    -1: sum(1 << (r * SIZE + SIZE - 1) for r in range(SIZE)),
+}
+
+# cell_id => 1 << cell_id (盤面配列からビットボードへの変換用)
+_BIT_WEIGHTS = np.array([1 << cell for cell in range(CELLS)], dtype=np.int64)
+
+def player_bitboard(board, value):
+    """
+    盤面配列 board から value (1 or -1) の石の位置をビットボードにして返す。
+    """
+    return int(_BIT_WEIGHTS[board == value].sum())
+
+@njit(cache=True)
+def valid_actions_mask(bb_p1, bb_m1):
+    """
+    空きセルのビットを立てたマスクを返す。
+    """
+    return ~(bb_p1 | bb_m1) & FULL_MASK
+
+def iter_bits(mask):
+    """
+    mask の立っているビットの番号 (= cell_id) を下位から順に返す。
+    """
+    while mask:
+        lsb = mask & -mask
+        yield lsb.bit_length() - 1
+        mask ^= lsb
+
+@njit(cache=True)
+def apply_action_bb(bb, action):
+    """
+    ビットボード bb の action 番目のセルに石を置いたビットボードを返す。
+    """
+    return bb | (1 << action)
+
+# valid_actions_mask / apply_action_bb / expand / edge_masks / check_winner_bb は
+# 探索 (Hex_core) からも呼ぶので Numba で JIT コンパイルする。Numba は dict を定数として埋め込めないため、
+# START_MASK / GOAL_MASK は整数に展開しておく。
+_START_P1 = START_MASK[1]
+_START_M1 = START_MASK[-1]
+_GOAL_P1 = GOAL_MASK[1]
+_GOAL_M1 = GOAL_MASK[-1]
+
+@njit(cache=True)
+def expand(frontier):
+    """
+    frontier の各セルの隣接セルをすべてORしたマスクを返す。
+    6方向の隣接はそれぞれ ±1, ±SIZE, ±(SIZE-1) のシフトになるので、
+    セルごとにループせず frontier 全体をまとめてシフトする。
+    """
+    return (
+        ((frontier >> 1) & NOT_RIGHT)             # 左
+        | ((frontier << 1) & NOT_LEFT)            # 右
+        | (frontier >> SIZE)                      # 上
+        | (frontier << SIZE)                      # 下
+        | ((frontier >> (SIZE - 1)) & NOT_LEFT)   # 右上
+        | ((frontier << (SIZE - 1)) & NOT_RIGHT)  # 左下
+    ) & FULL_MASK
+
+@njit(cache=True)
+def edge_masks(player):
+    """
+    player のスタート辺とゴール辺のマスクを返す。
+    player=1 は上端→下端, player=-1 は左端→右端
+    """
     if player == 1:
-        start = [i for i in range(SIZE) if board[0][i] == value]
-        goal = [i for i in range(SIZE * (SIZE - 1), SIZE * SIZE) if board[-1][i % SIZE] == value]
-    # プレイヤー2のスタートとゴール
-    else:
-        start = [i for i in range(0, SIZE * SIZE, SIZE) if board[i // SIZE][0] == value]
-        goal = [i for i in range(SIZE - 1, SIZE * SIZE, SIZE) if board[i // SIZE][-1] == value]
-
-    stack.extend(start)
-
-    while stack:
-        current = stack.pop()
-        if current in goal:
+        return _START_P1, _GOAL_P1
+    return _START_M1, _GOAL_M1
+
+@njit(cache=True)
+def check_winner_bb(player_bb, player):
+    """
+    player の石のビットボード player_bb がスタート辺とゴール辺を
+    つないでいるかを判定する。
+    visited (到達済みセル) も set ではなく整数のビットマスクで持つ。
+    """
+    start_mask, goal_mask = edge_masks(player)
+    frontier = start_mask & player_bb
+    reachable = 0
+    while frontier:
+        reachable |= frontier
+        if reachable & goal_mask:
             return True
-
-        if current not in visited:
-            visited.add(current)
-            neighbors = get_neighbors(current)
-            for neighbor in neighbors:
-                row, col = divmod(neighbor, SIZE)
-                if board[row][col] == value:
-                    stack.append(neighbor)
-
+        frontier = expand(frontier) & player_bb & ~reachable
     return False
 
+# 勝利条件判定関数
+def check_winner(board, player):
+    value = 1 if player == 1 else -1
+    return check_winner_bb(player_bitboard(board, value), player)
+
 
-# 盤面の初期化
+# 盤面の初期化 (cell_id で引けるフラットな int8 配列)
 def initialize_board(size=SIZE):
-    return [[0] * size for _ in range(size)]
+    return np.zeros(size * size, dtype=np.int8)
 
-# 行動が有効かを判定
+# 行動が有効かを判定 (範囲外の action は負の添字として扱わず無効とする)
 def is_valid_action(board, action):
-    row, col = divmod(action, SIZE)
-    return board[row][col] == 0
+    return 0 <= action < CELLS and board[action] == 0
 
 # 行動を盤面に適用
 def apply_action(board, action, player):
-    row, col = divmod(action, SIZE)
     if not is_valid_action(board, action):
         raise ValueError(f"Action {action} is invalid!")
-    board[row][col] = player
+    board[action] = player
+
+# 盤面を180度回転した盤面を返す (ROT は対合なので board[ROT] で求まる)
+def rotate_board(board):
+    return board[list(ROT)]
 
 # 盤面を可視化
 def display_board(board):
     symbols = {0: ".", 1: "O", -1: "X"}
-    for row in board:
-        print(" ".join(symbols[cell] for cell in row))
+    for row in board.reshape(SIZE, SIZE):
+        print(" ".join(symbols[int(cell)] for cell in row))
     print()
 
 # セル番号を座標に変換
 def convert_to_coordinates(action):
-    return divmod(action, SIZE)
+    return ROW[action], COL[action]
 
 # 座標をセル番号に変換
 def convert_to_action(row, col):